@@ -1,39 +1,89 @@
-import asyncio
-import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from mcp_use import MCPAgent, MCPClient
+import contextlib
+from pathlib import Path
+
+from runtime import load_env, run
+
+# Listings and prices change during the day; reuse answers for an hour.
+CACHE_TTL = 3600
+
+AIRBNB_CONFIG = Path(__file__).with_name("airbnb_mcp.json")
+
+AIRBNB_QUERY = (
+    "Find me a nice place to stay in Ibiza for 2 adults "
+    "for a week in July. I prefer places with a pool and "
+    "a good view of the sea and good reviews. I don't want to spend more than 3000€. "
+    "Show me the top 3 options."
+)
+
+# Step limit; the query is fixed, so there is nothing to size it by
+MAX_STEPS = 30
+
+# Yes/no question the verifier asks before accepting a cheap-model answer.
+ADEQUACY_CHECK = "Does this output list at least 3 listings, each with a price?"
 
 
 async def run_airbnb_agent():
     # Load environment variables
-    load_dotenv()
+    load_env()
 
-    # Create MCPClient from configuration dictionary
-    client = MCPClient.from_config_file(
-        os.path.join(os.path.dirname(__file__), "airbnb_mcp.json")
-    )
+    # Heavy imports stay here so importing this module (e.g. from run_all.py)
+    # only costs the constants above
+    from langchain_openai import ChatOpenAI
+    from mcp_use import MCPAgent, MCPClient
 
-    # Create LLM
-    llm = ChatOpenAI(model="gpt-4o")
+    from escalation import DEFAULT_MODEL, run_with_escalation
+    from llm_cache import LLMCache
+    from session_pool import load_mcp_config
+    from streaming import TokenStreamHandler
 
-    # Create agent with the client
-    agent = MCPAgent(llm=llm, client=client, max_steps=30)
+    # The exit stack closes the sessions even if the agent raises
+    async with contextlib.AsyncExitStack() as stack:
+        # Create MCPClient for the Airbnb server
+        client = MCPClient.from_dict(load_mcp_config(AIRBNB_CONFIG))
+        stack.push_async_callback(client.close_all_sessions)
+
+        # Writes tokens through as they arrive
+        stream = TokenStreamHandler()
+
+        def make_agent(model, escalated):
+            # Create LLM, streaming tokens to the terminal as they arrive
+            llm = ChatOpenAI(
+                model=model,
+                streaming=True,
+                stream_usage=True,
+                callbacks=[stream],
+            )
+
+            # Create agent with the client (same fixed limit when escalated)
+            return MCPAgent(
+                llm=llm,
+                client=client,
+                max_steps=MAX_STEPS,
+            )
+
+        # Reuse a recent answer for the same (fixed) query
+        cache = LLMCache(f"airbnb:{DEFAULT_MODEL}", ttl=CACHE_TTL)
+        key = cache.cache_key(DEFAULT_MODEL, AIRBNB_QUERY, None)
 
-    try:
         # Run a query to search for accomodations
-        results = await agent.run(
-            "Find me a nice place to stay in Ibiza for 2 adults "
-            "for a week in July. I prefer places with a pool and "
-            "a good view of the sea and good reviews. I don't want to spend more than 3000€. "
-            "Show me the top 3 options."
-        )
-        print(f"\nResult: {results}")
-    finally:
-        # Ensure that we clean up resources properly
-        if client.sessions:
-            await client.close_all_sessions()
+        results = await cache.get(key)
+        streamed, ok = results is None, True
+        if streamed:
+            # Try the cheap model first; escalate to gpt-4o if it is thin
+            results, ok = await run_with_escalation(
+                make_agent, AIRBNB_QUERY, DEFAULT_MODEL, ADEQUACY_CHECK
+            )
+            # Only keep answers that passed the check
+            if ok:
+                await cache.set(key, results)
+
+        # An accepted fresh answer was already streamed; print anything else
+        # (cached, or a rejected / non-LLM result such as a step-limit stop)
+        if streamed and ok:
+            print("\nResult: the last answer streamed above.")
+        else:
+            print(f"\nResult: {results}")
 
 
 if __name__ == "__main__":
-    asyncio.run(run_airbnb_agent())
+    run(run_airbnb_agent())
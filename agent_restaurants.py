@@ -10,15 +10,24 @@ return *at most five* ranked picks in a concise, emoji-bullet format.
 Workflow
 ~~~~~~~~~
 1. **Load secrets** from `.env` (your OpenAI key, etc.).
-2. **Instantiate** an `MCPClient` from `browser_mcp.json`, which describes the
-   remote Playwright-based browser tools.
-3. **Create** a `ChatOpenAI` model (no funky kwargs—keep the SDK happy).
+2. **Instantiate** an `MCPClient` from `browser_mcp.json` (or the shared
+   browser sidecar, see `session_pool`), which describes the remote
+   Playwright-based browser tools.
+3. **Create** a streaming `ChatOpenAI` model (`--model`, default
+   `gpt-4o-mini`) so tokens print as they arrive.  A quick verifier check
+   escalates to GPT-4o only when the cheap answer looks thin.
 4. **Wrap** the model and client in an `MCPAgent`, limiting tools to stay safe.
-5. **Build** the final prompt  
-   • *System instructions* → `AGENT_SYSTEM_PROMPT` (how to think / format)  
+5. **Build** the prompt as two messages  
+   • *System instructions* → `AGENT_SYSTEM_PROMPT` (how to think / format),
+     appended to the agent's system message so it stays a byte-identical
+     prefix that OpenAI's automatic prompt caching can reuse  
    • *User request*       → auto-composed from CLI flags.
-6. **Run** the agent, capture token / cost telemetry, and pretty-print results.
-7. **Close** any lingering browser sessions to avoid zombie Chrome processes.
+6. **Run** the agent (or reuse a cached answer from `llm_cache.LLMCache`, or
+   replay the tool calls recorded for the same cuisine via
+   `plan_cache.PlanCache`), capture token / cost telemetry, and pretty-print
+   results.
+7. **Close** all sessions – registered on an `AsyncExitStack`, so it happens
+   even when the run fails – to avoid zombie Chrome processes.
 
 Arguments
 ^^^^^^^^^
@@ -26,6 +35,7 @@ Arguments
 --cuisine   Optional cuisine filter—e.g. “sushi”  
 --budget    Budget string—e.g. “under $60 pp”  
 --guests    Party size (default: 2)
+--model     First-try OpenAI model (default: “gpt-4o-mini”)
 
 
 CLI
@@ -58,24 +68,48 @@ Notes
 ~~~~~
 * The agent **reflects after its first scrape**; if data looks thin, it
   revises its plan before output.  
-* Adjust `max_steps` for tough searches or debugging.
+* The step limit scales with the request (`step_budget`: 30 steps, plus 5
+  each for a cuisine and a budget filter), capped at `MAX_STEPS`; escalated
+  GPT-4o retries get the full cap.  Raise it for tough searches or debugging.
 """
 
 import argparse
-import asyncio
-import os
+import contextlib
 import time
-from dotenv import load_dotenv
+from typing import List, Optional
 
-# ---- LangChain imports ----
-from langchain_community.callbacks.manager import get_openai_callback
-from langchain_openai import ChatOpenAI
+from runtime import METRICS_FMT, load_env, run
 
-# ---- MCP ----
-from mcp_use import MCPAgent, MCPClient
+# LangChain, mcp_use and the helpers built on them are imported inside main():
+# they take most of a second to load and `--help` should not pay for that.
+
+# Reviews and rankings move slowly; a few hours of reuse is safe.
+CACHE_TTL = 6 * 3600
+
+TEMPERATURE = 0.7
+
+# Hard ceiling for `step_budget`, and the limit for escalated GPT-4o retries.
+MAX_STEPS = 40
+
+# AGENT_SYSTEM_PROMPT asks for at most this many restaurants.
+MAX_PICKS = 5
+
+# Yes/no question the verifier asks before accepting a cheap-model answer.
+ADEQUACY_CHECK = (
+    "Does this output list at least 3 ranked restaurants, each with a rating?"
+)
+
+# User request template; optional fields arrive pre-rendered (or empty) from
+# make_prompt().
+USER_QUERY_TMPL = (
+    "Find the best {cuisine}restaurant in {city} for {guests} guests{budget}. "
+    "Use Google search and any review sites you can access. "
+    "Return a ranked list with ratings and a short rationale."
+)
 
 # --------------------------------------------------------------------------- #
-#  System-level instructions embedded in the LLM prompt
+#  System-level instructions, sent as part of the agent's system message.
+#  Keep this free of per-run values so the prefix stays cacheable.
 # --------------------------------------------------------------------------- #
 AGENT_SYSTEM_PROMPT = (
     "You are a culinary concierge. You excel at reading live web pages and "
@@ -91,86 +125,217 @@ AGENT_SYSTEM_PROMPT = (
 ###############################################################################
 # CLI
 ###############################################################################
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
     Collect command-line options.
 
+    Parameters
+    ----------
+    argv : list of str, optional
+        Arguments to parse instead of ``sys.argv[1:]`` (used by `run_all`).
+
     Returns
     -------
     argparse.Namespace
         Parsed arguments with attributes ``city``, ``cuisine``, ``budget``,
-        and ``guests``.
+        ``guests``, and ``model``.
     """
     p = argparse.ArgumentParser(description="Scout top restaurants via MCP agents")
     p.add_argument("--city", default="San Francisco", help="Target city")
     p.add_argument("--cuisine", default="", help="Optional cuisine filter, e.g. sushi")
     p.add_argument("--budget", default="", help="e.g. under $60 per person")
     p.add_argument("--guests", default="2", help="Party size")
-    return p.parse_args()
+    p.add_argument(
+        "--model",
+        default="gpt-4o-mini",
+        help="OpenAI model to try first (escalates to gpt-4o if the answer is thin)",
+    )
+    return p.parse_args(argv)
 
 
-async def main() -> None:
+###############################################################################
+# Prompt builder
+###############################################################################
+def make_prompt(args: argparse.Namespace) -> str:
     """
-    Orchestrate the full agent run.
+    Compose the user request sent to the MCP agent.
 
-    * Loads environment variables.
-    * Builds the browser MCP client and LLM.
-    * Crafts the prompt from CLI inputs.
-    * Executes the agent, timing and metering OpenAI usage.
-    * Prints results and cleans up sessions.
-    """
-    load_dotenv()
-    args = parse_args()
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed CLI options.
 
-    # ----------------------------------------------------------------------- #
-    #  Build MCP client (browser automation lives in browser_mcp.json)
-    # ----------------------------------------------------------------------- #
-    client = MCPClient.from_config_file(
-        os.path.join(os.path.dirname(__file__), "browser_mcp.json")
-    )
+    Returns
+    -------
+    str
+        The user request; `AGENT_SYSTEM_PROMPT` travels separately.
+    """
+    parts = {
+        "cuisine": f"{args.cuisine} " if args.cuisine else "",
+        "city": args.city,
+        "guests": args.guests,
+        "budget": f" with a budget of {args.budget}" if args.budget else "",
+    }
+    return USER_QUERY_TMPL.format_map(parts)
 
-    # Plain ChatOpenAI – NO extra kwargs that confuse the OpenAI SDK
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
 
-    agent = MCPAgent(
-        llm=llm,
-        client=client,
-        max_steps=40,
-        disallowed_tools=["shell"],  # basic safety guard
-    )
+def max_steps_for(args: argparse.Namespace, escalated: bool) -> int:
+    """
+    Step limit for one agent run on the request in ``args``.
 
-    # ----------------------------------------------------------------------- #
-    #  Compose the full prompt (system instructions + user request)
-    # ----------------------------------------------------------------------- #
-    user_query = (
-        f"Find the best "
-        f"{f'{args.cuisine} ' if args.cuisine else ''}"
-        f"restaurant in {args.city} for {args.guests} guests"
-        f"{f' with a budget of {args.budget}' if args.budget else ''}. "
-        "Use Google search and any review sites you can access. "
-        "Return a ranked list with ratings and a short rationale."
-    )
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed CLI options; a cuisine or budget filter adds steps.
+    escalated : bool
+        Whether this is the escalation retry after a thin first answer.
 
-    full_prompt = f"{AGENT_SYSTEM_PROMPT}\n\n{user_query}"
+    Returns
+    -------
+    int
+        `MAX_STEPS` for escalation retries, otherwise the request-sized
+        `step_budget` (also for a first try on ``--model gpt-4o``).
+    """
+    from step_budget import step_budget
 
-    print("\n🔍  Query:", user_query)
-    t0 = time.perf_counter()
+    if escalated:
+        return MAX_STEPS
+    filters = bool(args.cuisine) + bool(args.budget)
+    return step_budget(MAX_STEPS, picks=MAX_PICKS, filters=filters)
 
-    with get_openai_callback() as cb:
-        result = await agent.run(full_prompt)
 
-    dt = time.perf_counter() - t0
-    print("\n📝  Result:\n", result)
-    print(
-        f"\n📊  Tokens: {cb.total_tokens:,} | "
-        f"Cost: ${cb.total_cost:.4f} | "
-        f"Elapsed: {dt:.1f}s"
-    )
+async def main() -> None:
+    """
+    Orchestrate the full agent run.
 
-    # Graceful cleanup
-    if client.sessions:
-        await client.close_all_sessions()
+    * Loads environment variables.
+    * Builds the browser MCP client and LLM.
+    * Crafts the prompt from CLI inputs.
+    * Executes the agent (or replays a cached answer / cached plan), timing
+      and metering OpenAI usage.
+    * Prints results and cleans up sessions.
+    """
+    args = parse_args()
+    load_env()
+
+    # ---- LangChain imports ----
+    from langchain_community.callbacks.manager import get_openai_callback
+    from langchain_openai import ChatOpenAI
+
+    # ---- MCP ----
+    from mcp_use import MCPAgent, MCPClient
+
+    from escalation import VERIFIER_MODEL, is_adequate, run_with_escalation
+    from llm_cache import LLMCache
+    from plan_cache import PlanCache, PlanRecorder, run_plan
+    from session_pool import browser_config, load_mcp_config
+    from streaming import TokenStreamHandler
+
+    # Cleanup is registered on the exit stack as soon as each resource
+    # exists, so it also runs when the agent raises.
+    async with contextlib.AsyncExitStack() as stack:
+        # ------------------------------------------------------------------- #
+        #  Instantiate MCP client (browser automation lives in browser_mcp.json,
+        #  or the shared sidecar when MCP_BROWSER_POOL is set)
+        # ------------------------------------------------------------------- #
+        client = MCPClient.from_dict(load_mcp_config(browser_config()))
+        # Graceful cleanup – close all sessions
+        stack.push_async_callback(client.close_all_sessions)
+
+        # The recorder captures the accepted run's tool calls for the plan
+        # cache; the stream handler writes tokens through without
+        # accumulating them.
+        recorder = PlanRecorder()
+        stream = TokenStreamHandler()
+
+        def make_agent(model: str, escalated: bool) -> MCPAgent:
+            recorder.steps.clear()
+            # Stream tokens to the terminal as they arrive; ``stream_usage``
+            # keeps the token/cost telemetry in get_openai_callback() working.
+            llm = ChatOpenAI(
+                model=model,
+                temperature=TEMPERATURE,
+                streaming=True,
+                stream_usage=True,
+                callbacks=[stream, recorder],
+            )
+            return MCPAgent(
+                llm=llm,
+                client=client,
+                max_steps=max_steps_for(args, escalated),
+                disallowed_tools=["shell"],  # basic safety guard
+                # Appended to mcp_use's system prompt (template + tool
+                # descriptions, well past the 1024-token prefix-cache
+                # threshold) instead of being glued onto the user query.
+                additional_instructions=AGENT_SYSTEM_PROMPT,
+            )
+
+        # ------------------------------------------------------------------- #
+        #  Compose the user request (system instructions live on the agent)
+        # ------------------------------------------------------------------- #
+        user_query = make_prompt(args)
+
+        # Exact hits only: requests that differ in any CLI flag never share
+        # an answer.
+        cache = LLMCache(f"restaurants:{args.model}:{TEMPERATURE}", ttl=CACHE_TTL)
+        key = cache.cache_key(
+            args.model, f"{AGENT_SYSTEM_PROMPT}\n\n{user_query}", TEMPERATURE
+        )
+
+        # Same cuisine, budget and party size ⇒ same search path; only the
+        # city is swapped into the recorded calls.
+        plans = PlanCache()
+        plan_key = ("restaurants", args.cuisine, args.budget, args.guests)
+        bindings = {"city": args.city}
+
+        print("\n🔍  Query:", user_query)
+        t0 = time.perf_counter()
+
+        # Only a full agent run streams its answer; cached and replayed answers
+        # (and a rejected or non-LLM agent result) still need printing below.
+        streamed, ok = False, True
+        with get_openai_callback() as cb:
+            result = await cache.get(key)
+            if result is None:
+                ok = False
+                steps = plans.get(plan_key, bindings)
+                if steps:
+                    result = await run_plan(
+                        client,
+                        steps,
+                        ChatOpenAI(model=VERIFIER_MODEL, temperature=0),
+                        AGENT_SYSTEM_PROMPT,
+                        user_query,
+                    )
+                    ok = result is not None and await is_adequate(
+                        result, ADEQUACY_CHECK
+                    )
+                if not ok:
+                    streamed = True
+                    result, ok = await run_with_escalation(
+                        make_agent, user_query, args.model, ADEQUACY_CHECK
+                    )
+                    if ok:
+                        plans.put(plan_key, recorder.steps, bindings)
+                # Never cache a failed answer (e.g. "stopped after max steps").
+                if ok:
+                    await cache.set(key, result)
+
+        dt = time.perf_counter() - t0
+        if streamed and ok:
+            # After an escalation both answers were streamed; name the final one.
+            print("\n📝  Result: the last answer streamed above.")
+        else:
+            print("\n📝  Result:\n", result)
+        print(
+            METRICS_FMT.format(
+                tok=cb.total_tokens,
+                cached=cb.prompt_tokens_cached,
+                cost=cb.total_cost,
+                dt=dt,
+            )
+        )
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -13,13 +13,25 @@ market-cap, then ranks up to *N* stocks according to a chosen strategy
 Workflow
 ~~~~~~~~
 1. **Secrets** – `.env` for OpenAI key, etc.  
-2. **Client** – `MCPClient.from_config_file("browser_mcp.json")` spawns /
-   attaches to the remote browser tools.  
-3. **Model** – `ChatOpenAI` (GPT-4o) set to deterministic `temperature=0.3`.  
-4. **Agent** – `MCPAgent` limits to 60 steps and blocks the `shell` tool.  
-5. **Prompt** – `AGENT_SYSTEM_PROMPT` + auto-built user query.  
-6. **Run** – Agent returns a markdown table; code prints it and usage stats.  
-7. **Cleanup** – Close any open browser sessions.
+2. **Client** – `MCPClient.from_dict(load_mcp_config(browser_config()))`
+   spawns / attaches to the remote browser tools (the shared sidecar when
+   `MCP_BROWSER_POOL` is set).  
+3. **Model** – `ChatOpenAI` (`--model`, default `gpt-4o-mini`) set to
+   deterministic `temperature=0.3`, streaming tokens to stdout as they are
+   generated.  A quick verifier check escalates to GPT-4o only when the
+   cheap model's table looks thin.  
+4. **Agent** – `MCPAgent` gets a step limit sized to the request by
+   `step_budget` (``--limit`` and whether ``--min_cap`` is set; at most 60,
+   and the full 60 for escalated GPT-4o retries) and blocks the `shell`
+   tool.  
+5. **Prompt** – `AGENT_SYSTEM_PROMPT` rides in the agent's system message (a
+   stable, cacheable prefix); the auto-built user query is sent on its own.  
+6. **Run** – Agent returns a markdown table (answers younger than the
+   strategy's `STRATEGY_TTL` window are replayed from `llm_cache.LLMCache`,
+   and a strategy seen before re-runs its recorded tool calls through
+   `plan_cache.PlanCache`); code prints it and usage stats.  
+7. **Cleanup** – Close all sessions via an `AsyncExitStack`, so it also
+   happens when the run fails.
 
 
 Arguments
@@ -27,7 +39,8 @@ Arguments
 --sector     Sector filter (default: “technology”)  
 --strategy   Screening style: value | growth | dividend  
 --min_cap    Minimum market cap *in USD* (integer, default 0)  
---limit      Max rows in output table (1 – 10, default 5)
+--limit      Max rows in output table (1 – 10, default 5)  
+--model      First-try OpenAI model (default: “gpt-4o-mini”)
 
 CLI
 ---
@@ -67,33 +80,51 @@ Notes
 ~~~~~
 * The agent **reflects after its first scrape** to ensure the data gathered is
   adequate; if not, it adjusts its plan automatically.  
-* Change `model=` to a cheaper or faster model if GPT-4o is overkill for your
-  budget or latency constraints.  
+* Pass `--model gpt-4o` to skip the cheap first try when you know the
+  screen is hard.  
 * For reproducible runs in CI, pin versions in a `requirements.txt`.
 """
 
 
 import argparse
-import asyncio
-import os
+import contextlib
 import time
+from typing import List, Optional
 
-from dotenv import load_dotenv
-from langchain_community.callbacks.manager import get_openai_callback
-from langchain_openai import ChatOpenAI
-from mcp_use import MCPAgent, MCPClient
+import runtime
+
+# LangChain / mcp_use are imported inside run() so `--help` stays instant.
+
+# Max answer reuse window per strategy, in seconds.  Intraday-driven screens
+# go stale within minutes; dividend yields barely move within the hour.
+STRATEGY_TTL = {"value": 300, "growth": 300, "dividend": 3600}
+
+TEMPERATURE = 0.3
+
+# Hard ceiling for `step_budget`, and the limit for escalated GPT-4o retries.
+MAX_STEPS = 60
+
+# Yes/no question the verifier asks before accepting a cheap-model answer.
+ADEQUACY_CHECK = (
+    "Does this output contain a markdown table of ranked tickers with price "
+    "and P/E filled in for each row?"
+)
 
 # --------------------------------------------------------------------------- #
-#  System-level instructions embedded in the LLM prompt
+#  System-level instructions, sent as part of the agent's system message.
+#  Keep this free of per-run values so the prefix stays cacheable.
 # --------------------------------------------------------------------------- #
 AGENT_SYSTEM_PROMPT = (
     "You are an equity-research analyst armed with a headless browser.\n"
     "Workflow:\n"
-    "1. Use Google / Yahoo Finance / Finviz (or similar) to pull **live** data.\n"
+    "1. Use Google / Yahoo Finance / Finviz (or similar) to pull **live** data. "
+    "Prefer one screener page that lists every candidate with its fundamentals "
+    "over opening tickers one at a time, and issue independent tool calls "
+    "together in a single step.\n"
     "2. After the first scrape, pause and reflect in ONE sentence on whether the "
     "data gathered is adequate for screening; adjust the plan if needed.\n"
-    "3. Rank up to {limit} tickers by the chosen strategy, justifying each pick "
-    "with a single line.\n\n"
+    "3. Rank the requested number of tickers by the chosen strategy, "
+    "justifying each pick with a single line.\n\n"
     "Output must be a markdown table with these columns:\n"
     "| Rank | Ticker | Price | P/E | Yield | Reason |"
 )
@@ -102,14 +133,20 @@ AGENT_SYSTEM_PROMPT = (
 ###############################################################################
 # CLI
 ###############################################################################
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
     Parse command-line flags.
 
+    Parameters
+    ----------
+    argv : list of str, optional
+        Arguments to parse instead of ``sys.argv[1:]`` (used by `run_all`).
+
     Returns
     -------
     argparse.Namespace
-        Namespace containing ``sector``, ``strategy``, ``min_cap``, and ``limit``.
+        Namespace containing ``sector``, ``strategy``, ``min_cap``, ``limit``,
+        and ``model``.
     """
     p = argparse.ArgumentParser(
         description="Screen stocks via an MCP agent that scrapes live finance sites."
@@ -133,9 +170,16 @@ def parse_args() -> argparse.Namespace:
         "--limit",
         type=int,
         default=5,
+        choices=range(1, 11),
+        metavar="N",
         help="Maximum number of stocks to return (1–10)",
     )
-    return p.parse_args()
+    p.add_argument(
+        "--model",
+        default="gpt-4o-mini",
+        help="OpenAI model to try first (escalates to gpt-4o if the table is thin)",
+    )
+    return p.parse_args(argv)
 
 
 ###############################################################################
@@ -143,7 +187,7 @@ def parse_args() -> argparse.Namespace:
 ###############################################################################
 def make_prompt(args: argparse.Namespace) -> str:
     """
-    Compose the full prompt sent to the MCP agent.
+    Compose the user request sent to the MCP agent.
 
     Parameters
     ----------
@@ -153,65 +197,188 @@ def make_prompt(args: argparse.Namespace) -> str:
     Returns
     -------
     str
-        Fully-formed prompt = system instructions + user request.
+        The user request; `AGENT_SYSTEM_PROMPT` travels separately.
     """
-    user_req = (
+    return (
         f"Find publicly-traded {args.sector} companies "
         f"with a market cap above ${args.min_cap:,}. "
         f"Apply a {args.strategy} strategy and return your {args.limit} top picks. "
         "Provide live fundamentals (price, P/E, dividend yield) and a short why."
     )
-    return AGENT_SYSTEM_PROMPT.format(limit=args.limit) + "\n\n" + user_req
 
 
-###############################################################################
-# Async runner
-###############################################################################
-async def run() -> None:
+def ttl_for(strategy: str) -> int:
     """
-    Entrypoint for the asyncio event loop.
+    Freshness window for cached answers of a given screening strategy.
 
-    Orchestrates environment loading, MCP/LLM setup, prompt execution,
-    pretty-printing, and cleanup.
-    """
-    load_dotenv()
-    args = parse_args()
+    Parameters
+    ----------
+    strategy : str
+        One of ``value``, ``growth``, ``dividend``.
 
-    # ---------- Build MCP client (browser tooling declared in browser_mcp.json) ----------
-    client = MCPClient.from_config_file(
-        os.path.join(os.path.dirname(__file__), "browser_mcp.json")
-    )
+    Returns
+    -------
+    int
+        Seconds a cached answer stays reusable.
+    """
+    return STRATEGY_TTL[strategy]
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
 
-    agent = MCPAgent(llm=llm, client=client, max_steps=60, disallowed_tools=["shell"])
+def max_steps_for(args: argparse.Namespace, escalated: bool) -> int:
+    """
+    Step limit for one agent run on the screen in ``args``.
 
-    full_prompt = make_prompt(args)
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed CLI options; ``limit`` and a ``min_cap`` filter add steps.
+    escalated : bool
+        Whether this is the escalation retry after a thin first answer.
 
-    print("\n🔍  Query:", full_prompt.splitlines()[-1])  # last line is the user request
-    start = time.perf_counter()
+    Returns
+    -------
+    int
+        `MAX_STEPS` for escalation retries, otherwise the request-sized
+        `step_budget` (also for a first try on ``--model gpt-4o``).
+    """
+    from step_budget import step_budget
 
-    with get_openai_callback() as cb:
-        result: str = await agent.run(full_prompt)
+    if escalated:
+        return MAX_STEPS
+    return step_budget(MAX_STEPS, picks=args.limit, filters=int(args.min_cap > 0))
 
-    elapsed = time.perf_counter() - start
 
-    # ---------- Pretty print ----------
-    print("\n📈  Result:\n")
-    print(result)
-    print(
-        f"\n📊  Tokens: {cb.total_tokens:,} | "
-        f"Cost: ${cb.total_cost:.4f} | "
-        f"Elapsed: {elapsed:.1f}s"
-    )
+###############################################################################
+# Async runner
+###############################################################################
+async def run() -> None:
+    """
+    Entrypoint for the asyncio event loop.
 
-    # ---------- Cleanup ----------
-    if client.sessions:
-        await client.close_all_sessions()
+    Orchestrates environment loading, MCP/LLM setup, prompt execution,
+    pretty-printing, and cleanup.
+    """
+    args = parse_args()
+    runtime.load_env()
+
+    from langchain_community.callbacks.manager import get_openai_callback
+    from langchain_openai import ChatOpenAI
+    from mcp_use import MCPAgent, MCPClient
+
+    from escalation import VERIFIER_MODEL, is_adequate, run_with_escalation
+    from llm_cache import LLMCache
+    from plan_cache import PlanCache, PlanRecorder, run_plan
+    from session_pool import browser_config, load_mcp_config
+    from streaming import TokenStreamHandler
+
+    # Cleanup is registered on the exit stack as soon as each resource
+    # exists, so it also runs when the agent raises.
+    async with contextlib.AsyncExitStack() as stack:
+        # ---------- Instantiate MCP client (browser_mcp.json or sidecar) ----------
+        client = MCPClient.from_dict(load_mcp_config(browser_config()))
+        # ---------- Cleanup: close all sessions ----------
+        stack.push_async_callback(client.close_all_sessions)
+
+        # The recorder captures the accepted run's tool calls for the plan cache;
+        # the stream handler writes tokens through without accumulating them.
+        recorder = PlanRecorder()
+        stream = TokenStreamHandler()
+
+        def make_agent(model: str, escalated: bool) -> MCPAgent:
+            recorder.steps.clear()
+            # Stream tokens as they arrive; stream_usage keeps token/cost telemetry.
+            llm = ChatOpenAI(
+                model=model,
+                temperature=TEMPERATURE,
+                streaming=True,
+                stream_usage=True,
+                callbacks=[stream, recorder],
+            )
+            # System instructions are appended to mcp_use's own system prompt so
+            # the whole system message is a stable prefix for OpenAI prompt caching.
+            return MCPAgent(
+                llm=llm,
+                client=client,
+                max_steps=max_steps_for(args, escalated),
+                disallowed_tools=["shell"],
+                additional_instructions=AGENT_SYSTEM_PROMPT,
+            )
+
+        user_req = make_prompt(args)
+
+        print("\n🔍  Query:", user_req)
+        start = time.perf_counter()
+
+        # Live data: the time bucket is part of the key, so an answer from an
+        # older bucket is never reused.
+        # Strategies have different TTLs, so each gets its own namespace.
+        ttl = ttl_for(args.strategy)
+        cache = LLMCache(f"stocks-{args.strategy}:{args.model}:{TEMPERATURE}", ttl=ttl)
+        key = cache.cache_key(
+            args.model,
+            f"{AGENT_SYSTEM_PROMPT}\n\n{user_req}",
+            TEMPERATURE,
+            bucket=int(time.time() // ttl),
+        )
+
+        # Same strategy, cap filter and row limit ⇒ same screener path; only the
+        # sector is swapped in.  Replayed plans re-scrape live pages, so they are
+        # as fresh as a full agent run.
+        plans = PlanCache()
+        plan_key = ("stocks", args.strategy, str(args.min_cap), str(args.limit))
+        bindings = {"sector": args.sector}
+
+        # Only a full agent run streams its answer; cached and replayed answers
+        # (and a rejected or non-LLM agent result) still need printing below.
+        streamed, ok = False, True
+        with get_openai_callback() as cb:
+            result = await cache.get(key)
+            if result is None:
+                ok = False
+                steps = plans.get(plan_key, bindings)
+                if steps:
+                    result = await run_plan(
+                        client,
+                        steps,
+                        ChatOpenAI(model=VERIFIER_MODEL, temperature=0),
+                        AGENT_SYSTEM_PROMPT,
+                        user_req,
+                    )
+                    ok = result is not None and await is_adequate(
+                        result, ADEQUACY_CHECK
+                    )
+                if not ok:
+                    streamed = True
+                    result, ok = await run_with_escalation(
+                        make_agent, user_req, args.model, ADEQUACY_CHECK
+                    )
+                    if ok:
+                        plans.put(plan_key, recorder.steps, bindings)
+                # Never cache a failed answer (e.g. "stopped after max steps").
+                if ok:
+                    await cache.set(key, result)
+
+        elapsed = time.perf_counter() - start
+
+        # ---------- Pretty print ----------
+        if streamed and ok:
+            # After an escalation both answers were streamed; name the final one.
+            print("\n📈  Result: the last table streamed above.")
+        else:
+            print("\n📈  Result:\n")
+            print(result)
+        print(
+            runtime.METRICS_FMT.format(
+                tok=cb.total_tokens,
+                cached=cb.prompt_tokens_cached,
+                cost=cb.total_cost,
+                dt=elapsed,
+            )
+        )
 
 
 ###############################################################################
 # Guard for sync invocation
 ###############################################################################
 if __name__ == "__main__":
-    asyncio.run(run())
+    runtime.run(run())
@@ -1,18 +1,19 @@
-import asyncio
-import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from mcp_use import MCPAgent, MCPClient
+import contextlib
+
+from runtime import load_env, run
+from session_pool import BROWSER_MCP_CONFIG, load_mcp_config
 
 
 async def main():
     # Load environment variables
-    load_dotenv()
+    load_env()
+
+    # Heavy imports stay here, like in the other agent scripts
+    from langchain_openai import ChatOpenAI
+    from mcp_use import MCPAgent, MCPClient
 
-    # Create MCPClient from config file
-    client = MCPClient.from_config_file(
-        os.path.join(os.path.dirname(__file__), "browser_mcp.json")
-    )
+    # Create MCPClient from the (once-parsed) config file
+    client = MCPClient.from_dict(load_mcp_config(BROWSER_MCP_CONFIG))
 
     # Create LLM
     llm = ChatOpenAI(model="gpt-4o")
@@ -20,13 +21,17 @@ async def main():
     # Create agent with the client
     agent = MCPAgent(llm=llm, client=client, max_steps=30)
 
-    # Run the query
-    result = await agent.run(
-        "Find the best restaurant in San Francisco USING GOOGLE SEARCH",
-        max_steps=30,
-    )
-    print(f"\nResult: {result}")
+    # Close the browser sessions even if the run fails
+    async with contextlib.AsyncExitStack() as stack:
+        stack.push_async_callback(client.close_all_sessions)
+
+        # Run the query
+        result = await agent.run(
+            "Find the best restaurant in San Francisco USING GOOGLE SEARCH",
+            max_steps=30,
+        )
+        print(f"\nResult: {result}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
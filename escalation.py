@@ -0,0 +1,92 @@
+"""
+Cheap-model-first agent runs with escalation to GPT-4o.
+
+Overview
+--------
+Most ranking questions are well within `gpt-4o-mini`'s reach, at a fraction
+of GPT-4o's price and latency.  `run_with_escalation` runs the agent on the
+requested (cheap) model, asks `VERIFIER_MODEL` a single yes/no question about
+the answer, and only re-runs the agent on `ESCALATION_MODEL` when the answer
+fails that check.  The verdict on the final answer is returned alongside it,
+so callers can keep failed answers (e.g. "stopped after max steps") out of
+their caches.
+
+Usage
+~~~~~
+    result, ok = await run_with_escalation(
+        make_agent,                      # (model, escalated) -> MCPAgent
+        query,
+        model="gpt-4o-mini",
+        criterion="Does this list at least 3 restaurants with ratings?",
+    )
+"""
+
+from typing import Any, Callable, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+
+DEFAULT_MODEL = "gpt-4o-mini"
+ESCALATION_MODEL = "gpt-4o"
+VERIFIER_MODEL = "gpt-4o-mini"
+
+
+async def is_adequate(result: str, criterion: str) -> bool:
+    """
+    Ask the verifier model whether ``result`` satisfies ``criterion``.
+
+    Parameters
+    ----------
+    result : str
+        The agent's answer.
+    criterion : str
+        A yes/no question about the answer.
+
+    Returns
+    -------
+    bool
+        ``True`` when the verifier answers YES.
+    """
+    verifier = ChatOpenAI(model=VERIFIER_MODEL, temperature=0, max_tokens=3)
+    reply = await verifier.ainvoke(
+        [
+            SystemMessage(content="You check agent output. Reply YES or NO only."),
+            HumanMessage(content=f"{criterion}\n\nOutput:\n{result}"),
+        ]
+    )
+    return str(reply.content).strip().upper().startswith("YES")
+
+
+async def run_with_escalation(
+    make_agent: Callable[[str, bool], Any],
+    query: str,
+    model: str,
+    criterion: str,
+) -> Tuple[str, bool]:
+    """
+    Run ``query`` on ``model``, retrying on `ESCALATION_MODEL` if inadequate.
+
+    Parameters
+    ----------
+    make_agent : callable
+        Builds an `MCPAgent` for a model name; the second argument is
+        ``True`` only for the escalation retry (e.g. to lift its step limit).
+    query : str
+        User request passed to ``agent.run``.
+    model : str
+        First-try model.  Runs already on `ESCALATION_MODEL` are not retried.
+    criterion : str
+        Yes/no adequacy question for `is_adequate`.
+
+    Returns
+    -------
+    tuple of (str, bool)
+        The final answer, and whether it passed the adequacy check.
+    """
+    result = await make_agent(model, False).run(query)
+    ok = await is_adequate(result, criterion)
+    if ok or model == ESCALATION_MODEL:
+        return result, ok
+    print(f"\n⤴️  Answer from {model} looked thin – escalating to {ESCALATION_MODEL}…")
+    result = await make_agent(ESCALATION_MODEL, True).run(query)
+    return result, await is_adequate(result, criterion)
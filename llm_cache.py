@@ -0,0 +1,151 @@
+"""
+Persistent response cache for MCP agent prompts.
+
+Overview
+--------
+Every agent run is a long chain of GPT-4o calls plus browser round trips, so
+re-asking the same question a few minutes later pays the full latency and
+cost again.  `LLMCache` short-circuits `agent.run(...)` for repeated prompts.
+
+Lookups are exact: the key is the SHA-256 of the normalised ``(model,
+prompt, temperature)`` triple, so whitespace and case differences collapse to
+the same key.  There is deliberately no similarity fallback – the agents'
+prompts are generated from CLI flags, and two requests that differ only in
+city or party size embed as near duplicates yet need different answers.
+
+Each cache is scoped to a ``namespace`` – agent, model, and temperature, e.g.
+``"restaurants:gpt-4o-mini:0.7"`` – and expired rows of that namespace are
+purged on every `set`.
+
+Time-sensitive agents (live market data) should also pass a ``bucket`` to
+`cache_key` – e.g. ``int(time.time() // ttl)`` – so the temporal anchor is an
+explicit part of the key.
+
+Entries live in a local SQLite file and expire after ``ttl`` seconds, so pick
+a short TTL for volatile data (stock prices) and a longer one for slow-moving
+data (restaurant reviews).
+
+Usage
+~~~~~
+    cache = LLMCache("restaurants:gpt-4o:0.7", ttl=6 * 3600)
+    key = cache.cache_key("gpt-4o", prompt, 0.7)
+    result = await cache.get(key)
+    if result is None:
+        result = await agent.run(prompt)
+        await cache.set(key, result)
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).with_name(".llm_cache.sqlite")
+
+# Bumped whenever the table layout changes; older cache files are discarded.
+_SCHEMA_VERSION = 3
+
+
+def _normalize(prompt: str) -> str:
+    """Collapse whitespace and case so trivially different prompts share a key."""
+    return " ".join(prompt.split()).lower()
+
+
+class LLMCache:
+    """
+    SQLite-backed exact-match cache for agent answers.
+
+    Parameters
+    ----------
+    namespace : str
+        Scope of this cache (agent, model, temperature).  Expiry only ever
+        touches rows of the same namespace.
+    path : Path
+        SQLite file to store entries in (created on first use).
+    ttl : float
+        Maximum age of a reusable entry, in seconds.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl: float = 3600.0,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self._db = sqlite3.connect(path)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS responses")
+            self._db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_namespace"
+            " ON responses (namespace, created_at)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def cache_key(
+        model: str,
+        prompt: str,
+        temperature: Optional[float],
+        bucket: Optional[int] = None,
+    ) -> str:
+        """
+        Deterministic key for an exact-match lookup.
+
+        Parameters
+        ----------
+        bucket : int, optional
+            Time bucket the answer is valid for; identical prompts in
+            different buckets never share an entry.
+
+        Returns
+        -------
+        str
+            Hex SHA-256 of the JSON-encoded, normalised request.
+        """
+        payload = {
+            "model": model,
+            "prompt": _normalize(prompt),
+            "temperature": temperature,
+            "bucket": bucket,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached answer for ``key``, or ``None`` on a miss."""
+        row = self._db.execute(
+            "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+            (key, time.time() - self.ttl),
+        ).fetchone()
+        return row[0] if row else None
+
+    async def set(self, key: str, response: str) -> None:
+        """
+        Store ``response`` under ``key``.
+
+        Only store answers that passed the caller's adequacy check; expired
+        rows of this namespace are deleted here so the table stays small.
+        """
+        now = time.time()
+        self._db.execute(
+            "DELETE FROM responses WHERE namespace = ? AND created_at < ?",
+            (self.namespace, now - self.ttl),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+            (key, self.namespace, response, now),
+        )
+        self._db.commit()
@@ -0,0 +1,284 @@
+"""
+Plan-template cache: replay a previous run's tool calls for a new city/sector.
+
+Overview
+--------
+"Best ramen in Portland" and "best ramen in Seattle" make the agent walk the
+same path – search, open the review sites, read, rank – and every step of
+that path is another GPT-4o planning call.  `PlanCache` remembers the tool
+calls of a successful run, keyed by every request parameter that is not
+bound (cuisine, budget, party size; strategy, minimum cap, row limit), with
+the swappable values (city, sector) turned into placeholders.  A value is only
+templated where it stands as a whole word or URL component, so "Rome" never
+rewrites "Romeo".  The next run with the same key:
+
+1. binds the new values into the recorded calls,
+2. executes them directly against the MCP server (no planning LLM), and
+3. condenses every fetched page into candidate notes in one concurrent
+   ``llm.abatch`` round trip (instead of one evaluate-then-decide agent step
+   per page), and
+4. asks a cheap model to rank the candidates, or to reply ``INSUFFICIENT`` –
+   in which case the caller falls back to the full agent.
+
+Only calls whose arguments mention a bound value are kept: those are the
+searches / navigations that fetch data.  Clicks on element refs and other
+page-specific calls would not survive a different page anyway.
+
+Usage
+~~~~~
+    recorder = PlanRecorder()                     # attach to the agent's LLM
+    plans = PlanCache()
+    steps = plans.get(key, {"city": "Seattle"})
+    result = steps and await run_plan(client, steps, cheap_llm, system, query)
+    if not result:
+        result = await agent.run(query)
+        plans.put(key, recorder.steps, {"city": "Seattle"})
+"""
+
+import asyncio
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, quote_plus
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import HumanMessage, SystemMessage
+from mcp.shared.exceptions import McpError
+
+DEFAULT_PLAN_PATH = Path(__file__).with_name(".plan_cache.json")
+
+# Truncate each replayed page so the extraction prompts stay cheap.
+MAX_OBSERVATION_CHARS = 8000
+
+_EXTRACT_PROMPT = (
+    "Extract every candidate relevant to the request from this page, one per "
+    "line, with the facts needed to rank it (ratings, prices, figures). "
+    "Reply NONE if the page has no candidates."
+)
+
+Step = Tuple[str, Dict[str, Any]]
+
+# How a bound value may appear inside JSON-encoded tool arguments.
+_ENCODINGS = {
+    "raw": lambda v: json.dumps(v, ensure_ascii=False)[1:-1],
+    "plus": quote_plus,
+    "pct": quote,
+}
+
+# A bound value must not touch a letter or digit on either side ("Rome" in
+# "Romeo", "technology" in "biotechnology"); a percent-escape such as "%20"
+# before it still counts as a separator.
+_BEFORE = r"(?:(?<![^\W_])|(?<=%[0-9A-Fa-f]{2}))"
+_AFTER = r"(?![^\W_])"
+
+# Errors a replayed tool call can legitimately hit (tool error, dropped
+# connection, timeout); anything else is a bug and should surface.
+_TOOL_ERRORS = (McpError, OSError, asyncio.TimeoutError)
+
+
+class PlanRecorder(AsyncCallbackHandler):
+    """
+    LLM callback that records every tool call the model decides to make.
+
+    Attach it to the agent's ``ChatOpenAI(callbacks=[...])``; after the run,
+    ``steps`` holds ``(tool_name, args)`` pairs in call order.
+    """
+
+    def __init__(self) -> None:
+        self.steps: List[Step] = []
+
+    async def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                for call in getattr(message, "tool_calls", None) or []:
+                    self.steps.append((call["name"], call["args"]))
+
+
+def _to_template(args: Dict[str, Any], bindings: Dict[str, str]) -> Optional[str]:
+    """
+    JSON-encode ``args`` with bound values replaced by ``{{name|enc}}`` markers.
+
+    Returns ``None`` when no bound value occurs as a whole word / URL component.
+
+    >>> _to_template({"url": "https://x.com/?q=ramen+San+Francisco"},
+    ...              {"city": "San Francisco"})
+    '{"url": "https://x.com/?q=ramen+{{city|plus}}"}'
+    >>> _to_template({"q": "Romeo and Juliet"}, {"city": "Rome"}) is None
+    True
+    >>> _to_template({"url": "/search?q=ramen%20Portland"}, {"city": "Portland"})
+    '{"url": "/search?q=ramen%20{{city|pct}}"}'
+    >>> _to_template({"url": "/screener?f=sec_technology"}, {"sector": "technology"})
+    '{"url": "/screener?f=sec_{{sector|raw}}"}'
+    >>> _to_template({"q": "biotechnology"}, {"sector": "technology"}) is None
+    True
+    """
+    text = json.dumps(args, ensure_ascii=False)
+    templated = text
+    for name, value in bindings.items():
+        if not value:
+            continue
+        # A one-word value looks the same in every encoding; group them so the
+        # context of each match can pick one.
+        forms: Dict[str, List[str]] = {}
+        for enc, fn in _ENCODINGS.items():
+            forms.setdefault(fn(value), []).append(enc)
+        # Longest forms first so "San+Francisco" wins over "San".
+        for form in sorted(forms, key=len, reverse=True):
+            templated = re.sub(
+                _BEFORE + re.escape(form) + _AFTER,
+                lambda m, encs=forms[form]: f"{{{{{name}|{_encoding_at(m, encs)}}}}}",
+                templated,
+            )
+    return templated if templated != text else None
+
+
+def _encoding_at(match: "re.Match[str]", encodings: List[str]) -> str:
+    """Pick the encoding a match that fits several of ``encodings`` was written in."""
+    before = match.string[max(0, match.start() - 3) : match.start()]
+    if "plus" in encodings and before.endswith("+"):
+        return "plus"
+    if "pct" in encodings and (
+        before[-1:] in ("/", "=", "&") or re.fullmatch(r"%[0-9A-Fa-f]{2}", before)
+    ):
+        return "pct"
+    return "raw" if "raw" in encodings else encodings[0]
+
+
+def _bind(template: str, bindings: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Inverse of `_to_template` for a new set of values.
+
+    >>> _bind('{"url": "/search?q=ramen+{{city|plus}}"}', {"city": "New York"})
+    {'url': '/search?q=ramen+New+York'}
+    """
+    for name, value in bindings.items():
+        for enc, fn in _ENCODINGS.items():
+            template = template.replace(f"{{{{{name}|{enc}}}}}", fn(value))
+    return json.loads(template)
+
+
+class PlanCache:
+    """
+    JSON-file store of tool-call templates.
+
+    Parameters
+    ----------
+    path : Path
+        File the templates are persisted to.
+    """
+
+    def __init__(self, path: Path = DEFAULT_PLAN_PATH) -> None:
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._plans: Dict[str, List[List[str]]] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._plans = {}
+
+    @staticmethod
+    def _key(key: Sequence[str]) -> str:
+        # Every request parameter that is not bound must be part of ``key``:
+        # a replay only swaps bound values, everything else is reused as-is.
+        return json.dumps(list(key))
+
+    def get(self, key: Sequence[str], bindings: Dict[str, str]) -> Optional[List[Step]]:
+        """Recorded steps for ``key`` with ``bindings`` filled in, or ``None``."""
+        plan = self._plans.get(self._key(key))
+        if not plan:
+            return None
+        return [(name, _bind(template, bindings)) for name, template in plan]
+
+    def put(
+        self, key: Sequence[str], steps: Sequence[Step], bindings: Dict[str, str]
+    ) -> None:
+        """Templatise ``steps`` against ``bindings`` and persist them under ``key``."""
+        plan = []
+        for name, args in steps:
+            template = _to_template(args, bindings)
+            if template is not None:
+                plan.append([name, template])
+        if not plan:
+            return
+        self._plans[self._key(key)] = plan
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._plans, f, ensure_ascii=False, indent=2)
+
+
+def _fall_back(reason: str) -> None:
+    """Say why replay is abandoned; the caller then runs the full agent."""
+    print(f"\n↩️  Plan replay fell back to the agent: {reason}")
+    return None
+
+
+async def run_plan(
+    client: Any,
+    steps: Sequence[Step],
+    llm: Any,
+    instructions: str,
+    query: str,
+) -> Optional[str]:
+    """
+    Execute ``steps`` directly and have ``llm`` answer ``query`` from the pages.
+
+    All pages are condensed in a single ``llm.abatch`` call before the final
+    ranking pass, so K pages cost one concurrent round trip, not K turns.
+
+    Returns
+    -------
+    str or None
+        The answer, or ``None`` when replay failed or the model judged the
+        fetched pages insufficient (the caller should run the full agent).
+    """
+    if not client.sessions:
+        await client.create_all_sessions()
+    owners = {
+        tool.name: session
+        for session in client.sessions.values()
+        for tool in session.connector.tools
+    }
+
+    observations = []
+    for name, args in steps:
+        session = owners.get(name)
+        if session is None:
+            return _fall_back(f"tool {name!r} is no longer offered")
+        try:
+            result = await session.connector.call_tool(name, args)
+        except _TOOL_ERRORS as e:
+            return _fall_back(f"{name} raised {e!r}")
+        if getattr(result, "isError", False):
+            return _fall_back(f"{name} returned an error")
+        text = "\n".join(getattr(c, "text", "") for c in result.content)
+        observations.append(text[:MAX_OBSERVATION_CHARS])
+
+    extracts = await llm.abatch(
+        [
+            [
+                SystemMessage(content=_EXTRACT_PROMPT),
+                HumanMessage(content=f"Request: {query}\n\nPage:\n{page}"),
+            ]
+            for page in observations
+        ]
+    )
+    candidates = [
+        str(e.content).strip() for e in extracts if str(e.content).strip() != "NONE"
+    ]
+
+    reply = await llm.ainvoke(
+        [
+            SystemMessage(
+                content=f"{instructions}\n\nAnswer only from the candidate notes "
+                "provided. If they are not enough to answer, reply with the "
+                "single word INSUFFICIENT."
+            ),
+            HumanMessage(
+                content=f"{query}\n\nCandidate notes:\n\n" + "\n\n".join(candidates)
+            ),
+        ]
+    )
+    answer = str(reply.content).strip()
+    if not answer or "INSUFFICIENT" in answer:
+        return _fall_back("replayed pages were insufficient")
+    return answer
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Run the restaurant, stock, and Airbnb agents concurrently.
+
+Overview
+--------
+Each agent spends nearly all of its wall time waiting on OpenAI and on the
+browser, so running the three scripts back to back wastes most of it.  This
+entry point loads secrets once, starts all three agents on one event loop,
+and awaits them together with `asyncio.gather`, so the total time is roughly
+that of the slowest agent rather than the sum of all three.  One agent
+failing does not cut the others short: every run finishes before any client
+is closed, and failures are reported per agent.
+
+Workflow
+~~~~~~~~
+1. **Secrets** – `.env` is loaded once for all agents.
+2. **Clients** – the two browser agents get separate clients built from the
+   same browser config (they must not drive the same tab); the Airbnb agent
+   gets its own server.  Without the sidecar, each browser client spawns its
+   own Playwright server, and two of them on the default on-disk profile
+   collide ("Browser is already in use"), so run_all adds ``--isolated`` to
+   its copies of `browser_mcp.json`: each server then gets a throwaway
+   in-memory profile.  The sidecar already runs isolated.
+3. **Agents** – one `MCPAgent` factory per script, with that script's
+   prompt, temperature, and request-sized step limit.
+4. **Run** – `asyncio.gather(..., return_exceptions=True)` over the three
+   agent runs (each cheap-model first, escalating to GPT-4o if its answer
+   looks thin), metered by a single `get_openai_callback()`.
+5. **Cleanup** – an `AsyncExitStack` closes every client's sessions, also
+   when an agent raises.
+
+Arguments
+^^^^^^^^^
+--restaurants  Flags forwarded to `agent_restaurants.py` (quoted string)
+--stocks       Flags forwarded to `agent_stocks.py` (quoted string)
+
+CLI
+---
+❯ python run_all.py \
+    --restaurants '--city "Portland" --cuisine ramen' \
+    --stocks '--strategy growth --limit 3'
+
+Notes
+~~~~~
+* Token streaming is left off here: three agents writing to one terminal at
+  once would interleave mid-word.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import shlex
+import time
+from typing import Any, Dict, List, Optional
+
+import agent_air_bnb
+import agent_restaurants
+import agent_stocks
+from runtime import METRICS_FMT, load_env, run
+
+
+###############################################################################
+# CLI
+###############################################################################
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line flags.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Arguments to parse instead of ``sys.argv[1:]``.
+
+    Returns
+    -------
+    argparse.Namespace
+        Namespace containing ``restaurants`` and ``stocks`` flag strings.
+    """
+    p = argparse.ArgumentParser(
+        description="Run the restaurant, stock, and Airbnb agents concurrently."
+    )
+    p.add_argument(
+        "--restaurants",
+        default="",
+        help="Flags for agent_restaurants.py, e.g. '--city Portland'",
+    )
+    p.add_argument(
+        "--stocks",
+        default="",
+        help="Flags for agent_stocks.py, e.g. '--strategy growth'",
+    )
+    return p.parse_args(argv)
+
+
+def _isolated(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add ``--isolated`` to every locally spawned server in ``config``.
+
+    ``config`` must be a private copy (as `load_mcp_config` returns).  URL
+    entries – the sidecar – are left alone.
+    """
+    for server in config["mcpServers"].values():
+        args = server.get("args")
+        if args is not None and "--isolated" not in args:
+            args.append("--isolated")
+    return config
+
+
+###############################################################################
+# Async runner
+###############################################################################
+async def main() -> None:
+    """
+    Build the three agents and run them concurrently.
+
+    Prints each agent's result under its own heading, followed by the
+    combined token / cost telemetry.
+    """
+    args = parse_args()
+    rest_args = agent_restaurants.parse_args(shlex.split(args.restaurants))
+    stock_args = agent_stocks.parse_args(shlex.split(args.stocks))
+    rest_query = agent_restaurants.make_prompt(rest_args)
+    stock_query = agent_stocks.make_prompt(stock_args)
+    load_env()
+
+    from langchain_community.callbacks.manager import get_openai_callback
+    from langchain_openai import ChatOpenAI
+    from mcp_use import MCPAgent, MCPClient
+
+    from escalation import DEFAULT_MODEL, run_with_escalation
+    from session_pool import browser_config, load_mcp_config
+
+    async with contextlib.AsyncExitStack() as stack:
+        # Two browser servers at once need separate profiles (see module notes).
+        rest_client = MCPClient.from_dict(_isolated(load_mcp_config(browser_config())))
+        stock_client = MCPClient.from_dict(_isolated(load_mcp_config(browser_config())))
+        bnb_client = MCPClient.from_dict(load_mcp_config(agent_air_bnb.AIRBNB_CONFIG))
+        clients = (rest_client, stock_client, bnb_client)
+        # Close all three clients' sessions concurrently.
+        stack.push_async_callback(
+            lambda: asyncio.gather(*(c.close_all_sessions() for c in clients))
+        )
+
+        # Separate ChatOpenAI instances only because the models and temperatures
+        # differ; langchain-openai shares one HTTP connection pool between them.
+        def rest_agent(model: str, escalated: bool) -> MCPAgent:
+            return MCPAgent(
+                llm=ChatOpenAI(model=model, temperature=agent_restaurants.TEMPERATURE),
+                client=rest_client,
+                max_steps=agent_restaurants.max_steps_for(rest_args, escalated),
+                disallowed_tools=["shell"],
+                additional_instructions=agent_restaurants.AGENT_SYSTEM_PROMPT,
+            )
+
+        def stock_agent(model: str, escalated: bool) -> MCPAgent:
+            return MCPAgent(
+                llm=ChatOpenAI(model=model, temperature=agent_stocks.TEMPERATURE),
+                client=stock_client,
+                max_steps=agent_stocks.max_steps_for(stock_args, escalated),
+                disallowed_tools=["shell"],
+                additional_instructions=agent_stocks.AGENT_SYSTEM_PROMPT,
+            )
+
+        def bnb_agent(model: str, escalated: bool) -> MCPAgent:
+            return MCPAgent(
+                llm=ChatOpenAI(model=model),
+                client=bnb_client,
+                max_steps=agent_air_bnb.MAX_STEPS,
+            )
+
+        print("\n🚀  Running restaurant, stock, and Airbnb agents concurrently…")
+        start = time.perf_counter()
+
+        with get_openai_callback() as cb:
+            # return_exceptions: a failing agent must not propagate while the
+            # others are still driving clients the exit stack is about to close.
+            results = await asyncio.gather(
+                run_with_escalation(
+                    rest_agent,
+                    rest_query,
+                    rest_args.model,
+                    agent_restaurants.ADEQUACY_CHECK,
+                ),
+                run_with_escalation(
+                    stock_agent,
+                    stock_query,
+                    stock_args.model,
+                    agent_stocks.ADEQUACY_CHECK,
+                ),
+                run_with_escalation(
+                    bnb_agent,
+                    agent_air_bnb.AIRBNB_QUERY,
+                    DEFAULT_MODEL,
+                    agent_air_bnb.ADEQUACY_CHECK,
+                ),
+                return_exceptions=True,
+            )
+        # Measured before the exit stack closes the sessions.
+        elapsed = time.perf_counter() - start
+
+    titles = ("📝  Restaurants", "📈  Stocks", "🏠  Airbnb")
+    for title, outcome in zip(titles, results):
+        print(f"\n{title}:\n")
+        if isinstance(outcome, BaseException):
+            print(f"❌  Failed: {outcome!r}")
+        else:
+            print(outcome[0])
+    print(
+        METRICS_FMT.format(
+            tok=cb.total_tokens,
+            cached=cb.prompt_tokens_cached,
+            cost=cb.total_cost,
+            dt=elapsed,
+        )
+    )
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,45 @@
+"""
+Process-level setup shared by every agent entry point.
+
+Overview
+--------
+The agent scripts can run on their own or all together under `run_all`.
+`load_env` reads `.env` the first time any of them asks and is a no-op
+after that; `run` is the event-loop entry point they all share, and
+`METRICS_FMT` the telemetry line they all print.
+"""
+
+import asyncio
+import functools
+from typing import Any, Coroutine, TypeVar
+
+from dotenv import load_dotenv
+
+T = TypeVar("T")
+
+# Token / cost / timing summary printed after a run; one shared template so
+# every entry point reports the same fields in the same layout.
+METRICS_FMT = (
+    "\n📊  Tokens: {tok:,} | Cached: {cached:,} | Cost: ${cost:.4f} | Elapsed: {dt:.1f}s"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def load_env() -> bool:
+    """Load `.env` once per process, whichever entry point asks first."""
+    load_dotenv()
+    return True
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run ``coro`` to completion on uvloop when installed, else plain asyncio.
+
+    uvloop runs the same coroutines on libuv, trimming per-read overhead on
+    the many small MCP / HTTP socket reads.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    return uvloop.run(coro)
@@ -0,0 +1,113 @@
+"""
+Shared MCP config loading, plus a launcher for a long-lived browser sidecar.
+
+Overview
+--------
+Every agent script used to build a fresh `MCPClient` and tear it down at the
+end, so each run paid for `npx` resolving `@playwright/mcp@latest`, Node
+start-up, and a Chromium cold start.  Each script only ever needs its client
+for one run, so there is nothing to pool in-process; the warm browser lives
+in a separate process instead:
+
+* **Sidecar** – ``python session_pool.py`` starts the Playwright MCP server
+  from `browser_mcp.json` (same command and env) once, listening on a local
+  port.  Set ``MCP_BROWSER_POOL=1`` (e.g. in `.env`) and the agents attach to
+  it through `browser_pool_mcp.json` instead of spawning their own browser
+  server.  It runs with ``--isolated``, so every client gets a fresh browser
+  context that is discarded when it disconnects; restart the sidecar to
+  reclaim the browser process itself.
+* **Config** – `load_mcp_config` parses each config file once per process
+  and `browser_config` picks the sidecar or the self-contained config.
+
+Usage
+~~~~~
+    client = MCPClient.from_dict(load_mcp_config(browser_config()))
+    try:
+        result = await MCPAgent(llm=llm, client=client).run(prompt)
+    finally:
+        await client.close_all_sessions()
+
+CLI
+---
+❯ python session_pool.py --port 8931
+"""
+
+import argparse
+import copy
+import functools
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+_HERE = Path(__file__).parent
+BROWSER_MCP_CONFIG = _HERE / "browser_mcp.json"
+BROWSER_POOL_CONFIG = _HERE / "browser_pool_mcp.json"
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_mcp_config(path: Path) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def load_mcp_config(path: Path) -> Dict[str, Any]:
+    """
+    Read and parse an MCP config file once per process.
+
+    Every client (including each agent's in `run_all`) built from the same
+    file reuses the parsed result instead of re-reading it from disk.  Each
+    call returns its own copy, so a client that mutates its config cannot
+    change the next one's.
+    """
+    return copy.deepcopy(_parse_mcp_config(path))
+
+
+def browser_config() -> Path:
+    """
+    Pick the browser MCP config for this run.
+
+    Returns
+    -------
+    Path
+        `browser_pool_mcp.json` when ``MCP_BROWSER_POOL`` is set (sidecar
+        running), otherwise the self-contained `browser_mcp.json`.
+    """
+    return BROWSER_POOL_CONFIG if os.getenv("MCP_BROWSER_POOL") else BROWSER_MCP_CONFIG
+
+
+###############################################################################
+# Sidecar launcher
+###############################################################################
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line flags for the sidecar.
+
+    Returns
+    -------
+    argparse.Namespace
+        Namespace containing ``port``.
+    """
+    p = argparse.ArgumentParser(
+        description="Run a long-lived Playwright MCP server the agents can share."
+    )
+    p.add_argument(
+        "--port",
+        type=int,
+        default=8931,
+        help="Port to listen on (must match browser_pool_mcp.json)",
+    )
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Same command and env (e.g. DISPLAY) the agents would spawn themselves.
+    server = load_mcp_config(BROWSER_MCP_CONFIG)["mcpServers"]["playwright"]
+    # --isolated gives each connected client its own browser context, so
+    # concurrent agents never share tabs or cookies.
+    os.execvpe(
+        server["command"],
+        [server["command"], *server["args"], "--port", str(args.port), "--isolated"],
+        {**os.environ, **server.get("env", {})},
+    )
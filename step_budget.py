@@ -0,0 +1,53 @@
+"""
+Size an agent's step limit to the request instead of a fixed worst case.
+
+Overview
+--------
+A flat ``max_steps=60`` lets a one-pick screen loop for 60 LLM calls before
+giving up.  `step_budget` scales the limit with what the request actually
+asks for – how many results it wants and how many optional filters (cuisine,
+budget, minimum market cap, …) it sets – and never exceeds the script's old
+hard cap.  Escalated GPT-4o retries should get the full cap rather than
+this budget: a truncated first run has already cost one attempt.
+"""
+
+# Search, open the first pages, reflect, and write the answer.
+BASE_STEPS = 15
+
+# Reading and checking one more result.
+STEPS_PER_PICK = 3
+
+# Narrowing the search for one optional filter.
+STEPS_PER_FILTER = 5
+
+
+def step_budget(max_cap: int, picks: int, filters: int = 0) -> int:
+    """
+    Step limit for one agent run.
+
+    Parameters
+    ----------
+    max_cap : int
+        Upper bound, normally the script's previous fixed ``max_steps``.
+    picks : int
+        Number of results the request asks for.
+    filters : int
+        Number of optional filters the request sets.
+
+    Returns
+    -------
+    int
+        ``min(max_cap, BASE_STEPS + STEPS_PER_PICK * picks
+        + STEPS_PER_FILTER * filters)``.
+
+    Examples
+    --------
+    >>> step_budget(60, picks=5)
+    30
+    >>> step_budget(60, picks=10, filters=1)
+    50
+    >>> step_budget(40, picks=5, filters=2)
+    40
+    """
+    budget = BASE_STEPS + STEPS_PER_PICK * picks + STEPS_PER_FILTER * filters
+    return min(max_cap, budget)
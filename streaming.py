@@ -0,0 +1,47 @@
+"""
+Token streaming for long agent runs.
+
+Overview
+--------
+A 60-step agent run streams every intermediate reasoning token.
+`TokenStreamHandler` writes each token straight through without keeping any
+of them, and ends the line when a step that printed text finishes so the
+next step's output starts clean.  Steps that only make tool calls stream no
+text and print nothing, so long runs do not fill the terminal with blank
+lines.
+"""
+
+import sys
+from typing import Any, TextIO
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+
+class TokenStreamHandler(AsyncCallbackHandler):
+    """
+    Write streamed tokens through to ``stream``, one line per agent step.
+
+    Parameters
+    ----------
+    stream : TextIO
+        Where tokens are written (default: stdout).
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout) -> None:
+        self.stream = stream
+        # Whether the current step has written any text yet.
+        self._wrote = False
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if not token:
+            return
+        self._wrote = True
+        self.stream.write(token)
+        self.stream.flush()
+
+    async def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        # One agent step is done: end its line so the next step starts clean.
+        if self._wrote:
+            self.stream.write("\n")
+            self.stream.flush()
+        self._wrote = False